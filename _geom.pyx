@@ -0,0 +1,56 @@
+# cython: boundscheck=False, cdivision=True, language_level=3
+"""AOT-compiled geometry kernels for the periscope simulator.
+
+Same semantics as the pure-Python/numba kernels in periscope_streamlit,
+but compiled ahead of time so there is no JIT warmup on cold start.
+Build in place with:
+
+    python setup.py build_ext --inplace
+
+The app falls back to the interpreted kernels when this extension is
+absent.
+"""
+
+
+cdef inline (double, double) _reflect_c(double vx, double vy,
+                                        double mx, double my) noexcept:
+    # normal to mirror
+    cdef double nx = -my
+    cdef double ny = mx
+    cdef double dot = vx * nx + vy * ny
+    # unit in, unit out; no re-normalization needed
+    return vx - 2.0 * dot * nx, vy - 2.0 * dot * ny
+
+
+cdef inline (double, double, double, double, bint) _intersect_c(
+        double x0, double y0, double vx, double vy,
+        double q1x, double q1y, double q2x, double q2y) noexcept:
+    cdef double dx = q2x - q1x
+    cdef double dy = q2y - q1y
+    cdef double bx = q1x - x0
+    cdef double by = q1y - y0
+
+    # Solve: p0 + s*v = q1 + t*d (Cramer's rule)
+    cdef double D = dx * vy - vx * dy
+    if -1e-6 < D < 1e-6:
+        return 0.0, 0.0, 0.0, 0.0, False  # nearly parallel
+
+    cdef double invD = 1.0 / D
+    cdef double s = (dx * by - bx * dy) * invD
+    cdef double t = (vx * by - vy * bx) * invD
+
+    if s < 0.0 or t < 0.0 or t > 1.0:
+        return 0.0, 0.0, 0.0, 0.0, False
+
+    return x0 + s * vx, y0 + s * vy, s, t, True
+
+
+def reflect(double vx, double vy, double mx, double my):
+    """Reflect unit direction (vx, vy) across unit mirror direction (mx, my)."""
+    return _reflect_c(vx, vy, mx, my)
+
+
+def intersect(double x0, double y0, double vx, double vy,
+              double q1x, double q1y, double q2x, double q2y):
+    """Ray/segment intersection; returns (ix, iy, s, t, hit)."""
+    return _intersect_c(x0, y0, vx, vy, q1x, q1y, q2x, q2y)
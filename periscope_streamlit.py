@@ -1,172 +1,387 @@
+import cmath
 import math
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
 import streamlit as st
-import matplotlib.pyplot as plt
+from PIL import Image, ImageDraw, ImageFont
+
+# Kernel preference: the prebuilt Cython extension (no warmup) if it is
+# there, else numba (JIT, ~1-2 s on first call), else pure Python.
+try:
+    import _geom
+except ImportError:
+    _geom = None
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to pure Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
 
 
 # ---------- Geometry helpers ----------
 
-def unit_vector_from_angle(deg: float):
+@lru_cache(maxsize=512)
+def _unit_vector_float(deg: float) -> tuple[float, float]:
+    # cmath.rect computes cos and sin in one libm call where the
+    # platform provides sincos, vs two separate dispatches
+    z = cmath.rect(1.0, math.radians(deg))
+    return z.real, z.imag
+
+
+# Unit vectors for whole degrees, built once at import time. The sliders
+# only emit integers, so the hot path is a table lookup instead of two
+# libm calls; index with deg + 180 (covers -180..360 inclusive).
+_UNIT_VEC = tuple(_unit_vector_float(float(d)) for d in range(-180, 361))
+_unit_vector_float.cache_clear()
+
+
+def unit_vector_from_angle(deg: float) -> tuple[float, float]:
     """Return a unit vector for an angle in degrees from +x axis (CCW)."""
-    rad = math.radians(deg)
-    return math.cos(rad), math.sin(rad)
+    if isinstance(deg, int) and -180 <= deg <= 360:
+        return _UNIT_VEC[deg + 180]
+    return _unit_vector_float(deg)
 
 
-def reflect_vector(v, m):
-    """Reflect direction vector v across a mirror whose direction is m."""
-    vx, vy = v
+def _mirror_endpoints(center, m, length):
+    cx, cy = center
+    half = length / 2.0
     mx, my = m
+    return (cx - half * mx, cy - half * my), (cx + half * mx, cy + half * my)
+
 
+@njit(cache=True)
+def _reflect(vx, vy, mx, my):
     # normal to mirror
     nx, ny = -my, mx
     dot = vx * nx + vy * ny
 
+    # v and m are unit vectors, so the reflection is already unit length;
+    # no re-normalization needed.
     rx = vx - 2 * dot * nx
     ry = vy - 2 * dot * ny
+    return rx, ry
 
-    length = math.hypot(rx, ry)
-    if length == 0:
-        return 0.0, 0.0
-    return rx / length, ry / length
 
+def reflect_vector(v, m):
+    """Reflect direction vector v across a mirror whose direction is m.
 
-def intersect_ray_with_segment(p0, v, c, m, length):
+    Both v and m must be unit vectors.
     """
-    Intersection between ray p0 + s*v and a finite segment centred at c,
-    with direction m and total length 'length'.
+    # Plain sqrt: hypot's over/underflow scaling is pointless for unit vectors
+    assert abs(math.sqrt(m[0] * m[0] + m[1] * m[1]) - 1.0) < 1e-9, \
+        "mirror direction must be unit"
+    return _reflect(v[0], v[1], m[0], m[1])
 
-    Returns (point, s, t) or None if no hit:
-      point = (x, y) intersection
-      s = parameter along ray  (>= 0)
-      t = parameter along mirror (|t| <= length/2)
-    """
-    x0, y0 = p0
-    vx, vy = v
-    cx, cy = c
-    mx, my = m
 
-    bx = cx - x0
-    by = cy - y0
+@njit(cache=True)
+def _intersect(x0, y0, vx, vy, q1x, q1y, q2x, q2y):
+    dx = q2x - q1x
+    dy = q2y - q1y
+    bx = q1x - x0
+    by = q1y - y0
 
-    # Solve: p0 + s*v = c + t*m
-    D = -vx * my + mx * vy
+    # Solve: p0 + s*v = q1 + t*d (Cramer's rule)
+    D = dx * vy - vx * dy
     if abs(D) < 1e-6:
-        return None  # nearly parallel
+        return 0.0, 0.0, 0.0, 0.0, False  # nearly parallel
 
-    s = (bx * (-my) - (-mx) * by) / D
-    t = (vx * by - vy * bx) / D
+    # One divide, two multiplies, instead of two divides
+    invD = 1.0 / D
+    s = (dx * by - bx * dy) * invD
+    t = (vx * by - vy * bx) * invD
 
-    if s < 0 or abs(t) > length / 2.0:
-        return None
+    if s < 0.0 or t < 0.0 or t > 1.0:
+        return 0.0, 0.0, 0.0, 0.0, False
 
     ix = x0 + s * vx
     iy = y0 + s * vy
-    return (ix, iy), s, t
+    return ix, iy, s, t, True
 
 
-# ---------- Drawing helpers ----------
+if _geom is not None:
+    # Shadow the interpreted kernels with the compiled ones; numba never
+    # gets invoked, so there is no JIT lag on cold start.
+    _reflect = _geom.reflect
+    _intersect = _geom.intersect
 
-def draw_periscope(ax):
-    # Tube rectangle
-    tube_left = 350
-    tube_right = 450
-    tube_bottom = 80
-    tube_top = 520
-
-    rect = plt.Rectangle(
-        (tube_left, tube_bottom),
-        tube_right - tube_left,
-        tube_top - tube_bottom,
-        fill=False,
-        linewidth=2,
-    )
-    ax.add_patch(rect)
-
-    ax.text(
-        400,
-        545,
-        "Periscope (side view)",
-        ha="center",
-        va="bottom",
-        fontsize=14,
-        weight="bold",
+
+def intersect_ray_with_endpoints(p0, v, q1, q2):
+    """
+    Intersection between ray p0 + s*v and the finite segment q1-q2.
+
+    Returns (point, s, t) or None if no hit:
+      point = (x, y) intersection
+      s = parameter along ray     (>= 0)
+      t = parameter along segment (0 <= t <= 1)
+
+    Taking endpoints directly avoids re-deriving the segment from
+    (centre, direction, length) that the caller already expanded for
+    drawing.
+    """
+    ix, iy, s, t, hit = _intersect(
+        p0[0], p0[1], v[0], v[1], q1[0], q1[1], q2[0], q2[1]
     )
+    if not hit:
+        return None
+    return (ix, iy), s, t
 
 
-def draw_mirror(ax, center, m, length, color="blue"):
-    cx, cy = center
-    half = length / 2.0
-    mx, my = m
+def intersect_rays_with_segments(P0, V, C, M, L):
+    """
+    Batch intersection of N rays P0 + s*V with N finite segments, given
+    in centre form (the scalar intersect_ray_with_endpoints takes the
+    expanded endpoints instead).
+
+    P0, V, C, M are (N, 2) arrays of ray origins, ray directions, segment
+    centres and segment directions; L is a scalar or (N,) array of segment
+    lengths.
+
+    Returns (points, s, t) where points is (N, 2) and s, t are (N,).
+    Misses (parallel, behind the origin, or off the segment) are NaN in
+    all three outputs; test with np.isfinite(s).
+    """
+    P0 = np.asarray(P0, dtype=float)
+    V = np.asarray(V, dtype=float)
+    C = np.asarray(C, dtype=float)
+    M = np.asarray(M, dtype=float)
+    L = np.asarray(L, dtype=float)
+
+    B = C - P0
+
+    # Solve: P0 + s*V = C + t*M (Cramer's rule, one 2x2 system per row)
+    D = -V[:, 0] * M[:, 1] + M[:, 0] * V[:, 1]
+    D = np.where(np.abs(D) < 1e-6, np.nan, D)  # mask near-parallel pairs
+
+    s = (B[:, 0] * (-M[:, 1]) + M[:, 0] * B[:, 1]) / D
+    t = (V[:, 0] * B[:, 1] - V[:, 1] * B[:, 0]) / D
+
+    miss = (s < 0) | (np.abs(t) > L / 2.0)
+    s = np.where(miss, np.nan, s)
+    t = np.where(miss, np.nan, t)
+
+    points = P0 + s[:, None] * V
+    return points, s, t
+
+
+# ---------- Ray tracing ----------
+
+_MIRROR_LENGTH = 150.0
+
+# Scene invariants: mirror centres and the incoming ray
+_TOP_CENTER = (400.0, 450.0)
+_BOTTOM_CENTER = (400.0, 150.0)
+_RAY_START_X = 100.0
+_RAY_DIR0 = (1.0, 0.0)
+
+# Endpoints and direction of one mirror, expanded once per rerun and
+# shared by drawing and intersection.
+Mirror = namedtuple("Mirror", "p1 p2 dir")
+
+
+def make_mirror(center, angle_deg):
+    """Build a Mirror of standard length at 'center', tilted angle_deg."""
+    m = unit_vector_from_angle(angle_deg)
+    p1, p2 = _mirror_endpoints(center, m, _MIRROR_LENGTH)
+    return Mirror(p1, p2, m)
+
+
+def trace_rays(top_deg, bot_deg, entry_y):
+    """
+    Trace N rays through the periscope at once, for sweeping angle ranges
+    or animating fans of rays.
+
+    top_deg, bot_deg, entry_y are (N,) arrays of mirror angles (degrees)
+    and entry heights. Returns an (N, 4, 2) array of polyline vertices
+    (origin, top hit, bottom hit, far point); vertices past a miss are
+    NaN.
+
+    Entirely branchless: misses propagate as NaN through the array ops,
+    so there is no per-ray Python control flow.
+    """
+    top_deg = np.asarray(top_deg, dtype=float)
+    bot_deg = np.asarray(bot_deg, dtype=float)
+    entry_y = np.asarray(entry_y, dtype=float)
+    n = top_deg.shape[0]
 
-    x1 = cx - half * mx
-    y1 = cy - half * my
-    x2 = cx + half * mx
-    y2 = cy + half * my
+    top_rad = np.radians(top_deg)
+    bot_rad = np.radians(bot_deg)
+    top_m = np.column_stack([np.cos(top_rad), np.sin(top_rad)])
+    bot_m = np.column_stack([np.cos(bot_rad), np.sin(bot_rad)])
 
-    ax.plot([x1, x2], [y1, y2], color=color, linewidth=4)
+    top_c = np.broadcast_to(_TOP_CENTER, (n, 2))
+    bot_c = np.broadcast_to(_BOTTOM_CENTER, (n, 2))
 
+    p0 = np.column_stack([np.full(n, _RAY_START_X), entry_y])
+    v = np.broadcast_to(_RAY_DIR0, (n, 2))
 
-def draw_ray_path(ax, top_angle_deg, bottom_angle_deg, entry_height):
-    mirror_length = 150
+    def _reflect_batch(v, m):
+        # n = (-my, mx); r = v - 2(v.n)n, unit in and unit out
+        nvec = np.column_stack([-m[:, 1], m[:, 0]])
+        dot = np.sum(v * nvec, axis=1, keepdims=True)
+        return v - 2.0 * dot * nvec
 
-    top_center = (400, 450)
-    bottom_center = (400, 150)
+    p1, _, _ = intersect_rays_with_segments(p0, v, top_c, top_m, _MIRROR_LENGTH)
+    v1 = _reflect_batch(v, top_m)
 
-    top_m = unit_vector_from_angle(top_angle_deg)
-    bottom_m = unit_vector_from_angle(bottom_angle_deg)
+    p2, _, _ = intersect_rays_with_segments(p1, v1, bot_c, bot_m, _MIRROR_LENGTH)
+    v2 = _reflect_batch(v1, bot_m)
+
+    far = p2 + 1000.0 * v2
+
+    return np.stack([p0, p1, p2, far], axis=1)
+
+
+@st.cache_data
+def compute_ray_polyline(top_angle_deg, bottom_angle_deg, entry_height):
+    """
+    Trace the ray through the periscope and return its polyline as a list
+    of (x, y) points.
+
+    The list always starts at the ray origin; it ends early (2 or 3 points)
+    if the ray misses a mirror, or has 4 points (origin, top hit, bottom
+    hit, far point) for a complete path.
+
+    Cached on the three slider values, so an unchanged interaction is a
+    dictionary hit instead of a re-trace.
+    """
+    top = make_mirror(_TOP_CENTER, top_angle_deg)
+    bottom = make_mirror(_BOTTOM_CENTER, bottom_angle_deg)
 
     # incoming ray from left
-    ray_start = (100, entry_height)
-    ray_dir = (1.0, 0.0)
+    ray_start = (_RAY_START_X, entry_height)
+    ray_dir = _RAY_DIR0
 
     # --- 1) to top mirror ---
-    hit1 = intersect_ray_with_segment(ray_start, ray_dir, top_center, top_m, mirror_length)
+    hit1 = intersect_ray_with_endpoints(ray_start, ray_dir, top.p1, top.p2)
 
     if hit1 is None:
-        ax.plot(
-            [ray_start[0], 750],
-            [ray_start[1], ray_start[1]],
-            color="red",
-            linewidth=2,
-        )
-        ax.text(220, entry_height + 10, "Incoming light", fontsize=10)
-        return
+        return [ray_start, (750, entry_height)]
 
     p1, _, _ = hit1
-    ax.plot([ray_start[0], p1[0]], [ray_start[1], p1[1]], color="red", linewidth=2)
-
-    ray_dir = reflect_vector(ray_dir, top_m)
+    ray_dir = reflect_vector(ray_dir, top.dir)
 
     # --- 2) to bottom mirror ---
-    hit2 = intersect_ray_with_segment(p1, ray_dir, bottom_center, bottom_m, mirror_length)
+    hit2 = intersect_ray_with_endpoints(p1, ray_dir, bottom.p1, bottom.p2)
 
     if hit2 is None:
         far = (p1[0] + ray_dir[0] * 1000, p1[1] + ray_dir[1] * 1000)
-        ax.plot([p1[0], far[0]], [p1[1], far[1]], color="red", linewidth=2)
-        ax.text(220, entry_height + 10, "Incoming light", fontsize=10)
-        return
+        return [ray_start, p1, far]
 
     p2, _, _ = hit2
-    ax.plot([p1[0], p2[0]], [p1[1], p2[1]], color="red", linewidth=2)
-
-    ray_dir = reflect_vector(ray_dir, bottom_m)
+    ray_dir = reflect_vector(ray_dir, bottom.dir)
 
     # --- 3) final outgoing ray ---
     far = (p2[0] + ray_dir[0] * 1000, p2[1] + ray_dir[1] * 1000)
-    ax.plot([p2[0], far[0]], [p2[1], far[1]], color="red", linewidth=2)
+    return [ray_start, p1, p2, far]
 
-    ax.text(220, entry_height + 10, "Incoming light", fontsize=10)
-    ax.text(560, 150, "Outgoing light", fontsize=10)
 
+# ---------- Drawing helpers ----------
 
-# ---------- Streamlit app ----------
+# Styling, hoisted out of the per-rerun render calls
+_RAY_KW = dict(fill="red", width=2)
+_MIRROR_KW = dict(fill="blue", width=4)
+_TUBE_KW = dict(outline="black", width=2)
 
-def main():
-    st.title("Periscope Light Ray Demonstrator")
-    st.write(
-        "Adjust the angles of the mirrors to see how the light ray reflects "
-        "inside a simple periscope."
+_SVG_RAY_STYLE = 'stroke="red" stroke-width="2"'
+_SVG_MIRROR_STYLE = 'stroke="blue" stroke-width="4"'
+
+
+def render_svg(polyline, mirrors, entry_height):
+    """
+    Render the scene as a bare SVG string: one rect, two mirror lines,
+    the ray polyline and three labels.
+
+    This bypasses matplotlib entirely (figure setup plus Agg
+    rasterization is tens of ms per rerun; formatting this string is
+    microseconds). SVG y runs downward, so plot y maps to 600 - y.
+    """
+    parts = [
+        '<svg viewBox="0 0 800 600" xmlns="http://www.w3.org/2000/svg" '
+        'style="max-width:100%;height:auto;background:white">',
+        '<rect x="350" y="80" width="100" height="440" '
+        'fill="none" stroke="black" stroke-width="2"/>',
+        '<text x="400" y="50" text-anchor="middle" font-size="18" '
+        'font-weight="bold">Periscope (side view)</text>',
+    ]
+
+    for mirror in mirrors:
+        (x1, y1), (x2, y2) = mirror.p1, mirror.p2
+        parts.append(
+            f'<line x1="{x1:.1f}" y1="{600 - y1:.1f}" '
+            f'x2="{x2:.1f}" y2="{600 - y2:.1f}" {_SVG_MIRROR_STYLE}/>'
+        )
+
+    for (x0, y0), (x1, y1) in zip(polyline, polyline[1:]):
+        parts.append(
+            f'<line x1="{x0:.1f}" y1="{600 - y0:.1f}" '
+            f'x2="{x1:.1f}" y2="{600 - y1:.1f}" {_SVG_RAY_STYLE}/>'
+        )
+
+    parts.append(
+        f'<text x="220" y="{600 - (entry_height + 10):.0f}" '
+        'font-size="13">Incoming light</text>'
     )
+    if len(polyline) == 4:
+        parts.append('<text x="560" y="450" font-size="13">Outgoing light</text>')
 
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+try:
+    _LABEL_FONT = ImageFont.load_default(16)
+    _TITLE_FONT = ImageFont.load_default(22)
+except TypeError:  # Pillow < 10.1 has no sized default font
+    _LABEL_FONT = _TITLE_FONT = ImageFont.load_default()
+
+
+def render_raster(polyline, mirrors, entry_height):
+    """
+    Rasterize the scene with Pillow: one rect, two mirror lines, the ray
+    polyline and three labels.
+
+    ImageDraw covers this workload at a fraction of the cost of a
+    matplotlib figure, and st.image takes the PIL image directly.
+    Image y runs downward, so plot y maps to 600 - y.
+    """
+    img = Image.new("RGB", (800, 600), "white")
+    draw = ImageDraw.Draw(img)
+
+    # Tube rectangle (y-symmetric, so the flip maps it onto itself)
+    draw.rectangle([350, 80, 450, 520], **_TUBE_KW)
+    draw.text(
+        (400, 50), "Periscope (side view)",
+        fill="black", font=_TITLE_FONT, anchor="mm",
+    )
+
+    for mirror in mirrors:
+        (x1, y1), (x2, y2) = mirror.p1, mirror.p2
+        draw.line([x1, 600 - y1, x2, 600 - y2], **_MIRROR_KW)
+
+    for (x0, y0), (x1, y1) in zip(polyline, polyline[1:]):
+        draw.line([x0, 600 - y0, x1, 600 - y1], **_RAY_KW)
+
+    draw.text(
+        (220, 600 - (entry_height + 10)), "Incoming light",
+        fill="black", font=_LABEL_FONT,
+    )
+    if len(polyline) == 4:
+        draw.text((560, 450), "Outgoing light", fill="black", font=_LABEL_FONT)
+
+    return img
+
+
+# ---------- Streamlit app ----------
+
+@st.fragment
+def _render():
+    """Controls plus drawing, as a fragment: moving a slider reruns only
+    this block instead of the whole script."""
     with st.sidebar:
         st.header("Controls")
         top_angle = st.slider(
@@ -190,34 +405,33 @@ def main():
             value=450,
             step=5,
         )
+        raster = st.checkbox("Raster rendering (PNG)", value=False)
+
+    # Expand each mirror to its endpoints once per rerun
+    top_mirror = make_mirror(_TOP_CENTER, top_angle)
+    bottom_mirror = make_mirror(_BOTTOM_CENTER, bottom_angle)
+
+    # Ray geometry is cached on the slider values
+    polyline = compute_ray_polyline(top_angle, bottom_angle, entry_height)
+
+    if raster:
+        st.image(render_raster(polyline, (top_mirror, bottom_mirror), entry_height))
+    else:
+        # Default: a handful of SVG lines, no rasterization at all
+        st.markdown(
+            render_svg(polyline, (top_mirror, bottom_mirror), entry_height),
+            unsafe_allow_html=True,
+        )
+
+
+def main():
+    st.title("Periscope Light Ray Demonstrator")
+    st.write(
+        "Adjust the angles of the mirrors to see how the light ray reflects "
+        "inside a simple periscope."
+    )
 
-    # Create figure
-    fig, ax = plt.subplots(figsize=(8, 6))
-
-    # Draw static parts
-    draw_periscope(ax)
-
-    # Draw mirrors
-    top_center = (400, 450)
-    bottom_center = (400, 150)
-    mirror_length = 150
-    top_m = unit_vector_from_angle(top_angle)
-    bottom_m = unit_vector_from_angle(bottom_angle)
-    draw_mirror(ax, top_center, top_m, mirror_length)
-    draw_mirror(ax, bottom_center, bottom_m, mirror_length)
-
-    # Draw ray
-    draw_ray_path(ax, top_angle, bottom_angle, entry_height)
-
-    # Format axes
-    ax.set_xlim(0, 800)
-    ax.set_ylim(0, 600)
-    ax.set_aspect("equal", adjustable="box")
-    ax.axis("off")
-
-    # Render in Streamlit and close figure (important on Streamlit Cloud)
-    st.pyplot(fig)
-    plt.close(fig)
+    _render()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,13 @@
+"""Optional build for the compiled geometry kernels.
+
+    python setup.py build_ext --inplace
+
+The app runs fine without this; it just uses the interpreted kernels.
+"""
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="periscope-geom",
+    ext_modules=cythonize("_geom.pyx"),
+)